@@ -1,15 +1,20 @@
 #!/usr/bin/env python
 
 import asyncio
-import jsonlines
+import heapq
+import os
+import sys
 import time
 import typer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Annotated
+from pydantic import TypeAdapter
+from typing import Annotated, AsyncIterator, Iterator, NamedTuple
 
-from utils.constants import EPGDataset
-from utils.edcb import CtrlCmdUtil, EDCBUtil, ServiceEventInfo
+from utils.constants import EPGDataset, JSONL_BUFFER_SIZE
+from utils.edcb import CtrlCmdUtil, EDCBUtil, EventInfo, ServiceEventInfo
 from utils.epg import FormatString, RemoveSymbols
 
 
@@ -27,6 +32,44 @@ DEFAULT_INCLUDE_NETWORK_IDS = [
     32391,   # TOKYO MX
 ]
 
+# EDCB から取得した元の番組情報 (EPGDataset.raw) を JSON にシリアライズするためのアダプター
+## EPGDataset の raw フィールドと同じスキーマでシリアライズされるため、出力される JSON も同一になる
+EVENT_INFO_ADAPTER = TypeAdapter(EventInfo)
+
+# ワーカープロセスに 1 回で渡す番組タイトル・番組概要の件数
+## 1 件ずつ渡すとプロセス間通信のオーバーヘッドが整形処理自体よりも大きくなるため、ある程度まとめて渡す
+FORMAT_CHUNK_SIZE = 2048
+
+
+class CollectedEvent(NamedTuple):
+    """ CollectEvents() で抽出した収集対象の番組 """
+    id: str  # 番組の ID (202301011230-NID32736-SID01024-EID00535 のフォーマット)
+    event_info: EventInfo  # EDCB から取得した元の番組情報
+    unique_key: int  # 重複判定に使う一意キー
+    event_name: str  # 整形前の番組タイトル
+    text_char: str  # 整形前の番組概要
+    start_time: datetime  # 番組開始時刻
+    duration_sec: int  # 番組長 (秒)
+
+
+def format_texts(texts: list[str]) -> list[tuple[str, str]]:
+    """
+    番組タイトルや番組概要を半角に変換し、記号を除去した文字列とともに返す
+    ProcessPoolExecutor のワーカープロセス上で実行される
+
+    Args:
+        texts (list[str]): 番組タイトルや番組概要のリスト
+
+    Returns:
+        list[tuple[str, str]]: 半角に変換した文字列と、そこから記号を除去した文字列の組のリスト
+    """
+
+    results: list[tuple[str, str]] = []
+    for text in texts:
+        formatted_text = FormatString(text)
+        results.append((formatted_text, RemoveSymbols(formatted_text)))
+    return results
+
 app = typer.Typer()
 
 @app.command()
@@ -36,6 +79,9 @@ def main(
     start_date: Annotated[datetime, typer.Option(help='過去 EPG データの取得開始日時 (UTC+9) 。')] = datetime.now() - timedelta(days=1),
     end_date: Annotated[datetime, typer.Option(help='過去 EPG データの取得終了日時 (UTC+9)。')] = datetime.now(),
     include_network_ids: Annotated[list[int], typer.Option(help='取得対象のネットワーク ID のリスト。', show_default=True)] = DEFAULT_INCLUDE_NETWORK_IDS,
+    max_concurrent_requests: Annotated[int, typer.Option(help='EDCB に同時に送る EPG データ取得リクエストの最大数。', show_default=True)] = 4,
+    num_workers: Annotated[int, typer.Option(help='番組タイトルや番組概要の整形に使うプロセス数。')] = os.cpu_count() or 1,
+    verbose: Annotated[bool, typer.Option(help='重複して除外した番組の ID を 1 件ずつ表示する。')] = False,
 ):
     """
     EDCB (EpgTimerSrv) に保存されている過去の EPG データを期間やネットワーク ID を指定して抽出し、JSONL 形式のデータセットを生成する。
@@ -63,24 +109,59 @@ def main(
     edcb.setConnectTimeOutSec(60)  # かなり時間かかることも見据えて長めに設定
 
     # 重複する番組を除外するためのセット
-    unique_set = set()
-
-    # 古い日付から EPG データを随時 JSONL ファイルに保存
-    with jsonlines.open(dataset_path, mode='w') as writer:
-
-        # 1 週間ごとに EDCB から過去の EPG データを取得
-        ## sendEnumPgArc は 1 回のリクエストで取得できるデータ量に制限があるため、1 週間ごとに取得する
-        current_start_date = start_date
-        while current_start_date < end_date:
-            current_end_date = current_start_date + timedelta(weeks=1)
-            if current_end_date > end_date:
-                current_end_date = end_date
-
-            print(f'取得期間: {current_start_date} ~ {current_end_date}')
-            service_event_info_list: list[ServiceEventInfo] = []
-
-            # EDCB から指定期間の EPG データを取得
-            result: list[ServiceEventInfo] | None = asyncio.run(edcb.sendEnumPgArc([
+    ## 数年分の番組 ID 文字列をすべて保持するとメモリを圧迫するため、ID を構成する値を 1 つの整数にまとめたものを保持する
+    unique_set: set[int] = set()
+
+    # 取得中の期間で重複により除外した番組の件数
+    ## 除外した番組を 1 件ずつ表示すると標準出力への書き込みに時間がかかるため、既定では期間ごとに件数だけを表示する
+    skipped_count = 0
+
+    def SkipDuplicate(epg_id: str) -> None:
+        nonlocal skipped_count
+        skipped_count += 1
+        if verbose is True:
+            print(f'Skip: {epg_id}')
+
+    # 取得対象の期間を 1 週間ごとに区切る
+    ## sendEnumPgArc は 1 回のリクエストで取得できるデータ量に制限があるため、1 週間ごとに取得する
+    date_ranges: list[tuple[datetime, datetime]] = []
+    current_start_date = start_date
+    while current_start_date < end_date:
+        current_end_date = current_start_date + timedelta(weeks=1)
+        if current_end_date > end_date:
+            current_end_date = end_date
+        date_ranges.append((current_start_date, current_end_date))
+        current_start_date = current_end_date
+
+    async def FetchEPGData(current_start_date: datetime, current_end_date: datetime) -> list[ServiceEventInfo]:
+        """ EDCB から指定期間の EPG データを取得する """
+
+        service_event_info_list: list[ServiceEventInfo] = []
+
+        # EDCB から指定期間の EPG データを取得
+        result: list[ServiceEventInfo] | None = await edcb.sendEnumPgArc([
+            # 絞り込み対象のネットワーク ID・トランスポートストリーム ID・サービス ID に掛けるビットマスク (?????)
+            ## よく分かってないけどとりあえずこれで全番組が対象になる
+            0xffffffffffff,
+            # 絞り込み対象のネットワーク ID・トランスポートストリーム ID・サービス ID
+            ## (network_id << 32 | transport_stream_id << 16 | service_id) の形式で指定しなければならないらしい
+            ## よく分かってないけどとりあえずこれで全番組が対象になる
+            0xffffffffffff,
+            # 絞り込み対象の番組開始時刻の最小値
+            EDCBUtil.datetimeToFileTime(current_start_date, tz=CtrlCmdUtil.TZ),
+            # 絞り込み対象の番組開始時刻の最大値 (自分自身を含まず、番組「開始」時刻が指定した時刻より前の番組が対象になる)
+            # たとえば 11:00:00 ならば 10:59:59 までの番組が対象になるし、11:00:01 ならば 11:00:00 までの番組が対象になる
+            EDCBUtil.datetimeToFileTime(current_end_date, tz=CtrlCmdUtil.TZ),
+        ])
+        if result is None:
+            print('Warning: 過去 EPG データの取得に失敗しました。')
+        else:
+            service_event_info_list.extend(result)
+
+        # もし「現在処理中の」取得終了日時が現在時刻よりも未来の場合、別の API を使って現在時刻以降の EPG データを取得
+        if current_end_date > datetime.now(tz=CtrlCmdUtil.TZ):
+            print('取得終了日時が現在時刻よりも未来なので、現在時刻以降の EPG データも取得します。')
+            result: list[ServiceEventInfo] | None = await edcb.sendEnumPgInfoEx([
                 # 絞り込み対象のネットワーク ID・トランスポートストリーム ID・サービス ID に掛けるビットマスク (?????)
                 ## よく分かってないけどとりあえずこれで全番組が対象になる
                 0xffffffffffff,
@@ -93,106 +174,189 @@ def main(
                 # 絞り込み対象の番組開始時刻の最大値 (自分自身を含まず、番組「開始」時刻が指定した時刻より前の番組が対象になる)
                 # たとえば 11:00:00 ならば 10:59:59 までの番組が対象になるし、11:00:01 ならば 11:00:00 までの番組が対象になる
                 EDCBUtil.datetimeToFileTime(current_end_date, tz=CtrlCmdUtil.TZ),
-            ]))
+            ])
             if result is None:
-                print('Warning: 過去 EPG データの取得に失敗しました。')
+                print('Warning: 将来 EPG データの取得に失敗しました。')
             else:
                 service_event_info_list.extend(result)
 
-            # もし「現在処理中の」取得終了日時が現在時刻よりも未来の場合、別の API を使って現在時刻以降の EPG データを取得
-            if current_end_date > datetime.now(tz=CtrlCmdUtil.TZ):
-                print('取得終了日時が現在時刻よりも未来なので、現在時刻以降の EPG データも取得します。')
-                result: list[ServiceEventInfo] | None = asyncio.run(edcb.sendEnumPgInfoEx([
-                    # 絞り込み対象のネットワーク ID・トランスポートストリーム ID・サービス ID に掛けるビットマスク (?????)
-                    ## よく分かってないけどとりあえずこれで全番組が対象になる
-                    0xffffffffffff,
-                    # 絞り込み対象のネットワーク ID・トランスポートストリーム ID・サービス ID
-                    ## (network_id << 32 | transport_stream_id << 16 | service_id) の形式で指定しなければならないらしい
-                    ## よく分かってないけどとりあえずこれで全番組が対象になる
-                    0xffffffffffff,
-                    # 絞り込み対象の番組開始時刻の最小値
-                    EDCBUtil.datetimeToFileTime(current_start_date, tz=CtrlCmdUtil.TZ),
-                    # 絞り込み対象の番組開始時刻の最大値 (自分自身を含まず、番組「開始」時刻が指定した時刻より前の番組が対象になる)
-                    # たとえば 11:00:00 ならば 10:59:59 までの番組が対象になるし、11:00:01 ならば 11:00:00 までの番組が対象になる
-                    EDCBUtil.datetimeToFileTime(current_end_date, tz=CtrlCmdUtil.TZ),
-                ]))
-                if result is None:
-                    print('Warning: 将来 EPG データの取得に失敗しました。')
-                else:
-                    service_event_info_list.extend(result)
-
-            # EPG データを整形
-            dataset_list: list[EPGDataset] = []
-            for service_event_info in service_event_info_list:
-                for event_info in service_event_info['event_list']:
-
-                    # デジタルTVサービスのみを対象にする
-                    ## ワンセグや独立データ放送は収集対象外
-                    if service_event_info['service_info']['service_type'] != 0x01:
-                        continue
-
-                    # 指定したネットワーク ID のみを対象にする
-                    if event_info['onid'] not in include_network_ids:
-                        continue
-
-                    # もし start_time or duration_sec or short_info がなければ中途半端な番組情報なのでスキップ
-                    if 'start_time' not in event_info or 'duration_sec' not in event_info or 'short_info' not in event_info:
-                        continue
-
-                    # short_info はあるがタイトルが空文字列ならスキップ
-                    if event_info['short_info']['event_name'] == '':
-                        continue
-
-                    # ID: 202301011230-NID32736-SID01024-EID00535 のフォーマット
-                    # 最初に番組開始時刻を付けて完全な一意性を担保する
-                    epg_id = f"{event_info['start_time'].strftime('%Y%m%d%H%M')}-NID{event_info['onid']:05d}-SID{event_info['sid']:05d}-EID{event_info['eid']:05d}"
-
-                    # 万が一 ID が重複する番組があれば除外
-                    ## EDCB の仕様に不備がなければ基本的にないはず
-                    if epg_id in unique_set:
-                        print(f'Skip: {epg_id}')
+        return service_event_info_list
+
+    async def FetchEPGDataInOrder() -> AsyncIterator[tuple[datetime, datetime, list[ServiceEventInfo]]]:
+        """ 複数の期間の EPG データを並列に取得し、古い期間から順に返す """
+
+        # 1 週間ずつ順番に取得すると EDCB からの応答待ちの時間がそのまま積み重なるため、複数の期間のリクエストを同時に投げておく
+        ## EDCB に負荷を掛けすぎないよう、また取得済みの EPG データが溜まりすぎないよう、同時に取得する期間の数には上限を設ける
+        pending: deque[tuple[datetime, datetime, asyncio.Task[list[ServiceEventInfo]]]] = deque()
+        for current_start_date, current_end_date in date_ranges:
+            pending.append((current_start_date, current_end_date, asyncio.create_task(FetchEPGData(current_start_date, current_end_date))))
+            if len(pending) >= max_concurrent_requests:
+                oldest_start_date, oldest_end_date, task = pending.popleft()
+                yield oldest_start_date, oldest_end_date, await task
+        while len(pending) > 0:
+            oldest_start_date, oldest_end_date, task = pending.popleft()
+            yield oldest_start_date, oldest_end_date, await task
+
+    # 取得対象のネットワーク ID は番組ごとに照合するため、リストではなく frozenset で保持する
+    include_network_id_set = frozenset(include_network_ids)
+
+    def CollectEvents(service_event_info: ServiceEventInfo) -> list[CollectedEvent]:
+        """ 1 サービス分の EPG データから収集対象の番組を抽出し、ID・一意キーとともに ID 順に返す """
+
+        events: list[CollectedEvent] = []
+
+        # デジタルTVサービスのみを対象にする
+        ## ワンセグや独立データ放送は収集対象外
+        if service_event_info['service_info']['service_type'] != 0x01:
+            return events
+
+        for event_info in service_event_info['event_list']:
+
+            # 指定したネットワーク ID のみを対象にする
+            if event_info['onid'] not in include_network_id_set:
+                continue
+
+            # もし start_time or duration_sec or short_info がなければ中途半端な番組情報なのでスキップ
+            if 'start_time' not in event_info or 'duration_sec' not in event_info or 'short_info' not in event_info:
+                continue
+
+            # short_info はあるがタイトルが空文字列ならスキップ
+            if event_info['short_info']['event_name'] == '':
+                continue
+
+            # ID: 202301011230-NID32736-SID01024-EID00535 のフォーマット
+            # 最初に番組開始時刻を付けて完全な一意性を担保する
+            ## 番組ごとに strftime() を呼ぶと遅いため、番組開始時刻の各値を直接書式化する
+            event_start_time = event_info['start_time']
+            epg_id = (
+                f"{event_start_time.year:04d}{event_start_time.month:02d}{event_start_time.day:02d}{event_start_time.hour:02d}{event_start_time.minute:02d}"
+                f"-NID{event_info['onid']:05d}-SID{event_info['sid']:05d}-EID{event_info['eid']:05d}"
+            )
+
+            # 万が一 ID が重複する番組があれば除外
+            ## EDCB の仕様に不備がなければ基本的にないはず
+            ## ID と同じく分単位の番組開始時刻・ネットワーク ID・サービス ID・イベント ID (いずれも 16bit) から一意キーを作る
+            ## 既に書き込み済みの番組と重複している場合は、番組タイトルや番組概要の整形自体を行わずにスキップする
+            unique_key = (int(event_start_time.timestamp()) // 60) << 48 | event_info['onid'] << 32 | event_info['sid'] << 16 | event_info['eid']
+            if unique_key in unique_set:
+                SkipDuplicate(epg_id)
+                continue
+
+            # 存在を確認した番組情報の値は、以降の処理で番組情報から引き直さずに済むよう一緒に保持する
+            events.append(CollectedEvent(
+                id = epg_id,
+                event_info = event_info,
+                unique_key = unique_key,
+                event_name = event_info['short_info']['event_name'],
+                text_char = event_info['short_info']['text_char'],
+                start_time = event_start_time,
+                duration_sec = event_info['duration_sec'],
+            ))
+
+        # heapq.merge() で突き合わせるため、サービスごとの番組を ID 順に並べておく
+        ## EDCB から返される番組は基本的に番組開始時刻順だが、保証はされておらず、同じ分に始まる番組のイベント ID が昇順とも限らない
+        ## 既に ID 順に並んでいる場合はほぼ線形時間で終わる
+        events.sort(key=lambda event: event.id)
+        return events
+
+    async def FormatTextsInParallel(executor: ProcessPoolExecutor, texts: list[str]) -> dict[str, tuple[str, str]]:
+        """ 番組タイトルや番組概要をワーカープロセスで並列に整形し、元の文字列から整形結果を引ける辞書として返す """
+
+        # 1 週間分の番組には定時ニュースなど同じ番組タイトルや番組概要が多く含まれるため、重複を除いてから整形する
+        ## 整形処理は CPU 負荷が高いため、複数のワーカープロセスに分けて並列に実行する
+        ## ワーカープロセスでの整形中もイベントループを止めず、次の期間の EPG データの取得を進められるようにする
+        unique_texts = list(dict.fromkeys(texts))
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(executor, format_texts, unique_texts[index:index + FORMAT_CHUNK_SIZE])
+            for index in range(0, len(unique_texts), FORMAT_CHUNK_SIZE)
+        ])
+        formatted_texts: dict[str, tuple[str, str]] = {}
+        for index, result in enumerate(results):
+            formatted_texts.update(zip(unique_texts[index * FORMAT_CHUNK_SIZE:(index + 1) * FORMAT_CHUNK_SIZE], result))
+        return formatted_texts
+
+    def IterateDataset(events: list[CollectedEvent], formatted_texts: dict[str, tuple[str, str]]) -> Iterator[tuple[EPGDataset, EventInfo, int]]:
+        """ 1 サービス分の収集対象の番組を整形済みの文字列から組み立て、元の番組情報・一意キーとともに ID 順に返す """
+
+        for event in events:
+            event_info = event.event_info
+
+            # 番組タイトルと番組概要を半角に変換した文字列と、そこから記号を除去した文字列を取得
+            title, title_without_symbols = formatted_texts[event.event_name]
+            description, description_without_symbols = formatted_texts[event.text_char]
+
+            # ジャンルの ID を取得
+            ## 複数のジャンルが存在する場合、最初のジャンルのみを取得
+            major_genre_id = -1
+            middle_genre_id = -1
+            if 'content_info' in event_info and len(event_info['content_info']['nibble_list']) >= 1:
+                major_genre_id = event_info['content_info']['nibble_list'][0]['content_nibble'] >> 8
+                middle_genre_id = event_info['content_info']['nibble_list'][0]['content_nibble'] & 0xf
+
+            # 元の番組情報 (raw) はモデルに持たせず、JSONL への書き込み時に付加する
+            ## モデルに持たせるとバリデーション時に番組情報全体が複製され、メモリ使用量が大きく膨らむ
+            ## 各フィールドの値はいずれもここで正しい型で組み立てているため、model_construct() でバリデーションを省いて生成する
+            yield EPGDataset.model_construct(
+                id = event.id,
+                network_id = event_info['onid'],
+                service_id = event_info['sid'],
+                transport_stream_id = event_info['tsid'],
+                event_id = event_info['eid'],
+                title = title,
+                title_without_symbols = title_without_symbols,
+                description = description,
+                description_without_symbols = description_without_symbols,
+                start_time = event.start_time,
+                duration = event.duration_sec,
+                major_genre_id = major_genre_id,
+                middle_genre_id = middle_genre_id,
+            ), event_info, event.unique_key
+
+    async def GenerateDataset(executor: ProcessPoolExecutor) -> None:
+        """ 古い日付から EPG データを随時 JSONL ファイルに保存する """
+
+        nonlocal skipped_count
+
+        # 1 行ずつ小さな書き込みが発生しないよう、大きめのバッファを持たせてファイルを開く
+        with open(dataset_path, mode='wb', buffering=JSONL_BUFFER_SIZE) as file:
+            async for current_start_date, current_end_date, service_event_info_list in FetchEPGDataInOrder():
+                print(f'取得期間: {current_start_date} ~ {current_end_date}')
+
+                # 整形した EPG データを ID 順に JSONL ファイルに保存
+                ## ID は番組開始時刻から始まるため、サービスごとに時系列順に並んだ番組を突き合わせるだけで 1 週間分の番組が ID 順に並ぶ
+                ## 1 週間分の番組をリストに溜めてからソートせず、整形した番組から随時書き込む
+                added_count = 0
+                skipped_count = 0
+                events_list = [CollectEvents(service_event_info) for service_event_info in service_event_info_list]
+                formatted_texts = await FormatTextsInParallel(executor, [
+                    text
+                    for events in events_list
+                    for event in events
+                    for text in (event.event_name, event.text_char)
+                ])
+                for dataset, event_info, unique_key in heapq.merge(*[IterateDataset(events, formatted_texts) for events in events_list], key=lambda x: x[0].id):
+
+                    # 同じ ID の番組が CollectEvents() 内の重複判定の後に書き込まれていることがあるため、ここでも重複を確認する
+                    if unique_key in unique_set:
+                        SkipDuplicate(dataset.id)
                         continue
-                    unique_set.add(epg_id)
-
-                    # 番組タイトルと番組概要を半角に変換
-                    title = FormatString(event_info['short_info']['event_name'])
-                    description = FormatString(event_info['short_info']['text_char'])
-
-                    # ジャンルの ID を取得
-                    ## 複数のジャンルが存在する場合、最初のジャンルのみを取得
-                    major_genre_id = -1
-                    middle_genre_id = -1
-                    if 'content_info' in event_info and len(event_info['content_info']['nibble_list']) >= 1:
-                        major_genre_id = event_info['content_info']['nibble_list'][0]['content_nibble'] >> 8
-                        middle_genre_id = event_info['content_info']['nibble_list'][0]['content_nibble'] & 0xf
-
-                    dataset_list.append(EPGDataset(
-                        id = epg_id,
-                        network_id = event_info['onid'],
-                        service_id = event_info['sid'],
-                        transport_stream_id = event_info['tsid'],
-                        event_id = event_info['eid'],
-                        title = title,
-                        title_without_symbols = RemoveSymbols(title),
-                        description = description,
-                        description_without_symbols = RemoveSymbols(description),
-                        start_time = event_info['start_time'],
-                        duration = event_info['duration_sec'],
-                        major_genre_id = major_genre_id,
-                        middle_genre_id = middle_genre_id,
-                        raw = event_info,
-                    ))
-
-            # ID 順にソート
-            dataset_list.sort(key=lambda x: x.id)  # type: ignore
-
-            # JSONL ファイルに保存
-            for dataset in dataset_list:
-                print(f'Add: {dataset.id}')
-                writer.write(dataset.model_dump(mode='json'))
-
-            # 次のループのために開始日時を更新
-            current_start_date = current_end_date
+                    unique_set.add(unique_key)
+
+                    # raw は EPGDataset の最後のフィールドなので、raw を除いた JSON の末尾の } の直前に付加する
+                    file.write(dataset.model_dump_json(exclude={'raw'}).encode('utf-8')[:-1])
+                    file.write(b',"raw":')
+                    file.write(EVENT_INFO_ADAPTER.dump_json(event_info))
+                    file.write(b'}\n')
+                    added_count += 1
+                print(f'Add: {added_count} 件 / Skip: {skipped_count} 件')
+
+    # 1 つのイベントループ上で全期間の EPG データを取得する
+    with ProcessPoolExecutor(max_workers=num_workers) as executor, asyncio.Runner() as runner:
+        # Python 3.12 以降では、タスクを生成した時点で最初の await まで同期的に実行させ、リクエストの送信を前倒しする
+        if sys.version_info >= (3, 12):
+            runner.get_loop().set_task_factory(asyncio.eager_task_factory)
+        runner.run(GenerateDataset(executor))
 
     elapsed_time = time.time() - start_time
     print(f'処理時間: {elapsed_time:.2f} 秒')
@@ -1,110 +1,281 @@
 #!/usr/bin/env python
 
 import ariblib.constants
-import jsonlines
-import random
+import hashlib
+import numpy as np
+import numpy.typing as npt
+import orjson
+import os
 import time
 import typer
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Annotated, Union
+from typing import Annotated, Iterator, NamedTuple, Union
 
-from utils.constants import EPGDatasetSubset, EPGDatasetSubsetInternal
+from utils.constants import EPGDatasetSubsetInternal, JSONL_BUFFER_SIZE
 from utils.edcb import CtrlCmdUtil
 
 
-def is_terrestrial(network_id: int) -> bool:
-    return 0x7880 <= network_id <= 0x7FE8
-
-def is_free_bs(network_id: int, service_id: int) -> bool:
-    return network_id == 0x0004 and not (191 <= service_id <= 209 or 234 <= service_id <= 256)
-
-def is_paid_bs_cs(network_id: int, service_id: int) -> bool:
-    return (network_id == 0x0006 or network_id == 0x0007) or (network_id == 0x0004 and (191 <= service_id <= 209 or 234 <= service_id <= 256))
-
-def meets_condition(data: EPGDatasetSubset) -> bool:
-    # ref: https://github.com/youzaka/ariblib/blob/master/ariblib/constants.py
-    # ショッピング番組は除外
-    if data.major_genre_id == 0x2 and data.middle_genre_id == 0x4:
-        return False
-    # ジャンルIDが不明な番組は除外
-    if data.major_genre_id >= 0xC:
-        return False
+# チャンネル種別 (EPGDatasetSubsetInternal.channel_class に格納する)
+CHANNEL_CLASS_UNKNOWN = -1
+CHANNEL_CLASS_TERRESTRIAL = 0
+CHANNEL_CLASS_FREE_BS = 1
+CHANNEL_CLASS_PAID_BS_CS = 2
+
+def get_channel_classes(network_id: npt.NDArray[np.uint16], service_id: npt.NDArray[np.uint16]) -> npt.NDArray[np.int8]:
+    # 各番組が地上波・BS (無料放送)・BS (有料放送) & CS のいずれに該当するかを配列に対してまとめて判定する
+    ## 番組ごとに検証時に一度だけ判定し、以降は channel_class を参照する
+    ## 範囲の判定は、下限を引いた値を符号なし整数として上限と比較する 1 回の比較で済ませる (下限未満の値は桁あふれして大きな値になる)
+    network_id = network_id.astype(np.uint16, copy=False)
+    service_id = service_id.astype(np.uint16, copy=False)
+    terrestrial = (network_id - np.uint16(0x7880)) <= (0x7FE8 - 0x7880)
+    # BS の有料放送 (WOWOW・スター・チャンネルなど) のサービス ID
+    paid_bs_service = ((service_id - np.uint16(191)) <= (209 - 191)) | ((service_id - np.uint16(234)) <= (256 - 234))
+    free_bs = (network_id == 0x0004) & ~paid_bs_service
+    paid_bs_cs = ((network_id == 0x0004) & paid_bs_service) | (network_id == 0x0006) | (network_id == 0x0007)
+    return np.select(
+        [terrestrial, free_bs, paid_bs_cs],
+        [CHANNEL_CLASS_TERRESTRIAL, CHANNEL_CLASS_FREE_BS, CHANNEL_CLASS_PAID_BS_CS],
+        default = CHANNEL_CLASS_UNKNOWN,
+    ).astype(np.int8)
+
+# サブセットの抽出対象とするジャンルのテーブル
+## (major_genre_id << 4) | middle_genre_id をインデックスとして、抽出対象なら True 、除外するなら False が入る
+## ref: https://github.com/youzaka/ariblib/blob/master/ariblib/constants.py
+ACCEPTED_GENRE_TABLE = np.array([
+    # ショッピング番組 (0x2 - 0x4) と、ジャンル ID が不明な番組 (0xC 以降) は除外
+    not ((major_genre_id == 0x2 and middle_genre_id == 0x4) or major_genre_id >= 0xC)
+    for major_genre_id in range(16) for middle_genre_id in range(16)
+], dtype=np.bool_)
+
+# サブセットの集計結果の表示に使う、大分類ジャンル・中分類ジャンルの名前
+## 表示のたびに ariblib.constants.CONTENT_TYPE を 2 段階で参照しないよう、ジャンル ID をキーにした辞書に展開しておく
+MAJOR_GENRE_NAMES = {
+    major_genre_id: major_genre[0]
+    for major_genre_id, major_genre in ariblib.constants.CONTENT_TYPE.items()
+}
+MIDDLE_GENRE_NAMES = {
+    (major_genre_id, middle_genre_id): f'{major_genre[0]} - {middle_genre_name}'
+    for major_genre_id, major_genre in ariblib.constants.CONTENT_TYPE.items()
+    for middle_genre_id, middle_genre_name in major_genre[1].items()
+}
+
+def meets_conditions(major_genre_id: npt.NDArray[np.int8], middle_genre_id: npt.NDArray[np.int8], titles: list[str]) -> npt.NDArray[np.bool_]:
+    # バリデーション前の JSONL の行から取り出した列に対して、各番組がサブセットの抽出条件を満たすかをまとめて判定する
+    ## 除外される番組のためにモデルを生成しないよう、番組ごとの分岐は Python で回さずに配列演算で済ませる
     # ジャンル自体が EPG データに含まれていない場合は除外
-    if data.major_genre_id == -1 or data.middle_genre_id == -1:
-        return False
+    has_genre = (major_genre_id != -1) & (middle_genre_id != -1)
+    # 除外対象のジャンルの番組は除外
+    ## 01-GenerateEPGDataset.py が出力するジャンル ID は、いずれも -1 以外は 0x0 ~ 0xF の範囲に収まる
+    ## ジャンルがない番組は -1 のままだとテーブルの範囲外を参照してしまうため、ダミーのインデックス 0 を参照させる
+    genre_index = np.where(has_genre, (major_genre_id.astype(np.int32) << 4) | middle_genre_id, 0)
+    is_accepted_genre = has_genre & ACCEPTED_GENRE_TABLE[genre_index]
     # タイトルが空文字列の番組は除外
-    if data.title.strip() == '':
-        return False
-    return True
-
-def get_weight(data: EPGDatasetSubset) -> float:
+    has_title = np.fromiter((title.strip() != '' for title in titles), dtype=np.bool_, count=len(titles))
+    return is_accepted_genre & has_title
+
+def get_unique_key(title: str, description: str) -> int:
+    # 番組タイトルと番組概要の組み合わせから、重複判定に使う 64bit のハッシュ値を算出する
+    ## 長い文字列のタプルをそのままセットに保持するとメモリを大量に消費するため、固定長の整数に縮める
+    ## 1,000 万件規模でも衝突確率は 10^-5 未満なので、サブセット生成の用途では無視できる
+    key = hashlib.blake2b(f'{title}\x1f{description}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(key, 'little')
+
+# JSONL データセットの各行で、EDCB から取得した生データ "raw" フィールドが始まる位置の目印
+## 現在の 01-GenerateEPGDataset.py は区切り文字の前後に空白を入れずに書き込むが、
+## 以前 jsonlines で書き込んでいた頃のデータセットでは区切り文字の後に空白が入っている
+RAW_FIELD_MARKERS = (b',"raw":', b', "raw": ')
+
+def strip_raw_field(line: bytes) -> bytes:
+    # 01-GenerateEPGDataset.py が出力する JSONL の各行では、"raw" フィールドが常に最後のフィールドになっている
+    ## raw は行の大半を占めるがサブセットでは利用しないため、JSON としてパースする前に raw 以降を切り落とす
+    ## JSON の文字列中の " は必ずエスケープされるので、最初に見つかった目印がトップレベルの raw フィールドの開始位置になる
+    for marker in RAW_FIELD_MARKERS:
+        index = line.find(marker)
+        if index != -1:
+            return line[:index] + b'}'
+    return line
+
+def parse_start_times(start_times: list[str]) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.int32], npt.NDArray[np.int32]]:
+    # ISO 8601 形式の番組開始時刻 (例: 2023-01-01T12:30:00+09:00) から、年・月・時をまとめて取り出す
+    ## 1 件ずつ datetime.fromisoformat() でパースせず、固定位置にある数字を配列演算で読み取る
+    ## いずれも番組開始時刻のタイムゾーン (UTC+9) における値になる
+    digits = np.frombuffer(''.join(start_time[:13] for start_time in start_times).encode('ascii'), dtype=np.uint8)
+    digits = digits.reshape(-1, 13).astype(np.int32) - ord('0')
+    start_year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    start_month = digits[:, 5] * 10 + digits[:, 6]
+    start_hour = digits[:, 11] * 10 + digits[:, 12]
+    return start_year, start_month, start_hour
+
+class ValidatedChunk(NamedTuple):
+    """ validate_lines() で JSONL データセットの 1 チャンク分を処理した結果 """
+    epg_count: int  # チャンクに含まれる番組数
+    skipped_counts: dict[str, int]  # 除外した番組の理由ごとの件数
+    unique_keys: npt.NDArray[np.uint64]  # 抽出条件を満たした番組の一意キー (64bit のハッシュ値)
+    offsets: npt.NDArray[np.int64]  # 抽出条件を満たした番組の JSONL データセット内でのバイトオフセット
+    channel_class: npt.NDArray[np.int8]  # 抽出条件を満たした番組のチャンネル種別
+    weights: npt.NDArray[np.float64]  # 抽出条件を満たした番組のサブセット化用の重み
+
+def validate_lines(lines: list[bytes], start_offset: int, start_date: datetime | None, end_date: datetime | None) -> ValidatedChunk:
+    # JSONL データセットの行をまとめて検証し、サブセットの抽出条件を満たす番組の一意キー・バイトオフセット・チャンネル種別・重みを返す
+    ## ProcessPoolExecutor のワーカープロセス上で実行される
+    ## 重複判定は JSONL の並び順に依存するため、ここでは一意キーの算出までを行い、判定自体は呼び出し元で行う
+    ## 除外した番組は 1 件ごとにログを出すと標準出力への書き込みだけで時間がかかるため、理由ごとの件数だけを返す
+    ## 抽出候補の番組自体はメモリに保持せず、サンプリングで選ばれた番組だけを後からバイトオフセットを元に読み直す
+    skipped_counts = {'condition': 0, 'start_date': 0, 'end_date': 0}
+    offsets: list[int] = []
+    network_ids: list[int] = []
+    service_ids: list[int] = []
+    major_genre_ids: list[int] = []
+    middle_genre_ids: list[int] = []
+    start_times: list[str] = []
+    titles: list[str] = []
+    descriptions: list[str] = []
+    offset = start_offset
+    for line in lines:
+        line_offset = offset
+        offset += len(line)
+        if line.strip() == b'':
+            continue
+        obj = orjson.loads(strip_raw_field(line))
+        offsets.append(line_offset)
+        network_ids.append(obj['network_id'])
+        service_ids.append(obj['service_id'])
+        major_genre_ids.append(obj['major_genre_id'])
+        middle_genre_ids.append(obj['middle_genre_id'])
+        start_times.append(obj['start_time'])
+        titles.append(obj['title'])
+        descriptions.append(obj['description'])
+    epg_count = len(offsets)
+
+    # 列ごとの配列は値の範囲に合わせた最小限の型で保持する
+    ## ネットワーク ID・サービス ID は 16bit 、ジャンル ID は -1 ~ 0xF に収まる
+    network_id = np.array(network_ids, dtype=np.uint16)
+    service_id = np.array(service_ids, dtype=np.uint16)
+    major_genre_id = np.array(major_genre_ids, dtype=np.int8)
+    middle_genre_id = np.array(middle_genre_ids, dtype=np.int8)
+
+    # サブセットの抽出条件を満たさない番組を除外
+    is_target = meets_conditions(major_genre_id, middle_genre_id, titles)
+    skipped_counts['condition'] = epg_count - int(np.count_nonzero(is_target))
+
+    # 抽出する番組範囲の開始日時・終了日時の外にある番組を除外
+    ## 番組開始時刻はいずれも UTC+9 なので、タイムゾーンを除いた秒単位の datetime64 同士で比較する
+    if start_date is not None or end_date is not None:
+        start_datetime = np.array([start_time[:19] for start_time in start_times], dtype='datetime64[s]')
+        if start_date is not None:
+            is_before_start_date = is_target & (start_datetime < np.datetime64(start_date.astimezone(CtrlCmdUtil.TZ).replace(tzinfo=None), 's'))
+            skipped_counts['start_date'] = int(np.count_nonzero(is_before_start_date))
+            is_target &= ~is_before_start_date
+        if end_date is not None:
+            is_after_end_date = is_target & (start_datetime > np.datetime64(end_date.astimezone(CtrlCmdUtil.TZ).replace(tzinfo=None), 's'))
+            skipped_counts['end_date'] = int(np.count_nonzero(is_after_end_date))
+            is_target &= ~is_after_end_date
+
+    # 以降は抽出条件を満たした番組だけを対象にする
+    target_indices = np.flatnonzero(is_target)
+    target_index_list = target_indices.tolist()
+    titles = [titles[index] for index in target_index_list]
+    descriptions = [descriptions[index] for index in target_index_list]
+    network_id = network_id[target_indices]
+    service_id = service_id[target_indices]
+    channel_class = get_channel_classes(network_id, service_id)
+    start_year, start_month, start_hour = parse_start_times([start_times[index] for index in target_index_list])
+    weights = get_weights(
+        network_id = network_id,
+        service_id = service_id,
+        channel_class = channel_class,
+        major_genre_id = major_genre_id[target_indices],
+        middle_genre_id = middle_genre_id[target_indices],
+        start_year = start_year,
+        start_month = start_month,
+        start_hour = start_hour,
+        is_nhk_special = np.array(['NHKスペシャル' in title for title in titles], dtype=np.bool_),
+        is_taiga_drama = np.array(['大河ドラマ' in title and 'min.' not in title for title in titles], dtype=np.bool_),
+    )
+    ## 一意キーは Python の int のリストのままだとワーカープロセスから受け渡す際のシリアライズに時間がかかるため、uint64 の配列に詰める
+    unique_keys = np.array([get_unique_key(title, description) for title, description in zip(titles, descriptions)], dtype=np.uint64)
+    return ValidatedChunk(epg_count, skipped_counts, unique_keys, np.array(offsets, dtype=np.int64)[target_indices], channel_class, weights)
+
+def validate_range(dataset_path: Path, start_offset: int, end_offset: int, start_date: datetime | None, end_date: datetime | None) -> ValidatedChunk:
+    # JSONL データセットの start_offset から end_offset までのバイト範囲をワーカープロセス自身で読み込み、validate_lines() で検証する
+    ## 呼び出し元で読み込んだ行をワーカープロセスに渡すと、データセット全体をプロセス間でシリアライズして受け渡すことになるため、
+    ## 呼び出し元は行の区切りに揃えたバイト範囲だけを決め、実際の読み込みは各ワーカープロセスが並列に行う
+    with open(dataset_path, mode='rb') as file:
+        file.seek(start_offset)
+        lines = file.read(end_offset - start_offset).splitlines(keepends=True)
+    return validate_lines(lines, start_offset, start_date, end_date)
+
+def get_weights(
+    network_id: npt.NDArray[np.uint16],
+    service_id: npt.NDArray[np.uint16],
+    channel_class: npt.NDArray[np.int8],
+    major_genre_id: npt.NDArray[np.int8],
+    middle_genre_id: npt.NDArray[np.int8],
+    start_year: npt.NDArray[np.int32],
+    start_month: npt.NDArray[np.int32],
+    start_hour: npt.NDArray[np.int32],
+    is_nhk_special: npt.NDArray[np.bool_],
+    is_taiga_drama: npt.NDArray[np.bool_],
+) -> npt.NDArray[np.float64]:
+
+    # 重みの計算に使う値を列ごとの配列として受け取り、全番組の重みを一括で計算する
+    terrestrial = channel_class == CHANNEL_CLASS_TERRESTRIAL
+    free_bs = channel_class == CHANNEL_CLASS_FREE_BS
 
     # 新しい番組ほど重みを大きくする
-    start_time = datetime.fromisoformat(data.start_time)
     start_date = datetime(2019, 10, 1)  # 基準日を2019年10月1日に設定
-    months_diff = (start_time.year - start_date.year) * 12 + start_time.month - start_date.month
-    months_diff = max(months_diff, 0)  # months_diff が負の値になることを防ぐ
-    weight = months_diff / 60 + 1  # 2019年10月を 1.0 、2024年3月を 2.0 とするための計算
+    months_diff = (start_year - start_date.year) * 12 + start_month - start_date.month
+    months_diff = np.maximum(months_diff, 0)  # months_diff が負の値になることを防ぐ
+    weights = months_diff / 60 + 1  # 2019年10月を 1.0 、2024年3月を 2.0 とするための計算
 
     # 下記は実際の割合に基づいてサブセット化用の重みを調整している
     ## 定時ニュース: 基本録画されないので重みを減らす
-    if data.major_genre_id == 0x0 and data.middle_genre_id == 0x0:
-        weight *= 0.8
+    weights[(major_genre_id == 0x0) & (middle_genre_id == 0x0)] *= 0.8
     ## ニュース・報道: 地上波で放送されるもののみ若干重みを大きくする
-    if data.major_genre_id == 0x0 and data.middle_genre_id != 0x0 and is_terrestrial(data.network_id):
-        weight *= 1.1
+    weights[(major_genre_id == 0x0) & (middle_genre_id != 0x0) & terrestrial] *= 1.1
     ## スポーツ: 地上波で放送されるもののみ若干重みを大きくする
-    if data.major_genre_id == 0x1 and is_terrestrial(data.network_id):
-        weight *= 1.75
+    weights[(major_genre_id == 0x1) & terrestrial] *= 1.75
     ## 情報・ワイドショー: まず録画されないので減らす
-    if data.major_genre_id == 0x2:
-        weight *= 0.7
+    weights[major_genre_id == 0x2] *= 0.7
     ## 国内ドラマ: 放送数がそう多くない割に重要なジャンルなので重みを大きくする (地上波のみ)
-    if data.major_genre_id == 0x3 and data.middle_genre_id == 0x0 and is_terrestrial(data.network_id):
-        # 朝4時〜18時に放送される主婦向けの再放送や昼ドラを除いて適用する
-        if not (4 <= start_time.hour <= 18):
-            weight *= 3.4
+    # 朝4時〜18時に放送される主婦向けの再放送や昼ドラを除いて適用する
+    weights[(major_genre_id == 0x3) & (middle_genre_id == 0x0) & terrestrial & ~((start_hour >= 4) & (start_hour <= 18))] *= 3.4
     ## 地上波以外 (無料BSなど) の国内ドラマ: 過去の高齢者向け刑事ドラマ系が多すぎるので減らす
-    if data.major_genre_id == 0x3 and data.middle_genre_id == 0x0 and not is_terrestrial(data.network_id):
-        weight *= 0.25
+    weights[(major_genre_id == 0x3) & (middle_genre_id == 0x0) & ~terrestrial] *= 0.25
     ## 海外ドラマ: 高齢者しか見ない割に多すぎるので全体的に減らす
-    if data.major_genre_id == 0x3 and data.middle_genre_id == 0x1:
-        weight *= 0.25
+    weights[(major_genre_id == 0x3) & (middle_genre_id == 0x1)] *= 0.25
     ## バラエティ: 地上波で放送されるもののみ若干重みを大きくする
-    if data.major_genre_id == 0x5 and is_terrestrial(data.network_id):
-        weight *= 1.1
+    weights[(major_genre_id == 0x5) & terrestrial] *= 1.1
     ## 映画: 数が少ない割に重要なジャンルなので重みを大きくする (地上波、無料BSのみ)
-    if data.major_genre_id == 0x6 and (is_terrestrial(data.network_id) or is_free_bs(data.network_id, data.service_id)):
-        weight *= 2.2
-        # 特にアニメ映画は少ない割に重要なので重みをさらに大きくする
-        if data.middle_genre_id == 0x2:
-            weight *= 5.0
+    weights[(major_genre_id == 0x6) & (terrestrial | free_bs)] *= 2.2
+    # 特にアニメ映画は少ない割に重要なので重みをさらに大きくする
+    weights[(major_genre_id == 0x6) & (terrestrial | free_bs) & (middle_genre_id == 0x2)] *= 5.0
     ## 国内アニメ: 重要なジャンルなので重みを大きくする (地上波、無料BSのみ)
-    if data.major_genre_id == 0x7 and data.middle_genre_id == 0x0 and (is_terrestrial(data.network_id) or is_free_bs(data.network_id, data.service_id)):
-        # 朝4時〜21時に放送されるアニメを除いて適用する (つまり深夜アニメのみ)
-        if not (4 <= start_time.hour <= 21):
-            weight *= 2.2
+    # 朝4時〜21時に放送されるアニメを除いて適用する (つまり深夜アニメのみ)
+    weights[(major_genre_id == 0x7) & (middle_genre_id == 0x0) & (terrestrial | free_bs) & ~((start_hour >= 4) & (start_hour <= 21))] *= 2.2
     ## ドキュメンタリー・教養: 地上波で放送されるもののみ若干重みを大きくする
-    if data.major_genre_id == 0x8 and is_terrestrial(data.network_id):
-        weight *= 1.2
+    weights[(major_genre_id == 0x8) & terrestrial] *= 1.2
     ## 趣味・教育: 見る人が少ないので若干減らす
-    if data.major_genre_id == 0xA:
-        weight *= 0.8
+    weights[major_genre_id == 0xA] *= 0.8
     ## AT-X のアニメ: 例外的に少し重みを大きくする
-    if data.network_id == 0x0007 and data.service_id == 333 and data.major_genre_id == 0x7:
-        weight *= 1.3
+    weights[(network_id == 0x0007) & (service_id == 333) & (major_genre_id == 0x7)] *= 1.3
     ## 「NHKスペシャル」がタイトルに入ってる番組: 数は少ないが重要なので重みを大きくする
-    if 'NHKスペシャル' in data.title:
-        weight *= 3.5
+    weights[is_nhk_special] *= 3.5
     ## 「大河ドラマ」がタイトルに入ってる番組: 数は少ないが重要なので重みを大きくする
-    if '大河ドラマ' in data.title and 'min.' not in data.title:
-        weight *= 3.5
+    weights[is_taiga_drama] *= 3.5
 
-    return weight
+    return weights
 
 
+# ワーカープロセスに一度に読み込ませる JSONL データセットのバイト数 (16MB)
+VALIDATION_CHUNK_BYTES = 16 * 1024 * 1024
+
+# 読み込み中の進捗を表示する間隔 (件数)
+PROGRESS_INTERVAL = 100000
+
 app = typer.Typer()
 
 @app.command()
@@ -114,6 +285,7 @@ def main(
     subset_size: Annotated[int, typer.Option(help='生成するデータセットのサブセットのサイズ')] = 5000,
     start_date: Annotated[Union[datetime, None], typer.Option(help='サブセットとして抽出する番組範囲の開始日時。')] = None,
     end_date: Annotated[Union[datetime, None], typer.Option(help='サブセットとして抽出する番組範囲の終了日時。')] = None,
+    num_workers: Annotated[int, typer.Option(help='JSONL データセットのバリデーションに使うプロセス数。')] = os.cpu_count() or 1,
 ):
     """
     JSONL 形式の EPG データセットのサブセットを期間やサイズを指定して生成する。
@@ -150,138 +322,198 @@ def main(
     start_time = time.time()
 
     all_epg_count = 0  # 重複している番組も含めた全データセットの件数
-    all_epg_data: list[EPGDatasetSubsetInternal] = []
-    terrestrial_data: list[EPGDatasetSubsetInternal] = []
-    free_bs_data: list[EPGDatasetSubsetInternal] = []
-    paid_bs_cs_data: list[EPGDatasetSubsetInternal] = []
-    unique_keys = set()
-
-    with jsonlines.open(dataset_path, 'r') as reader:
-        for obj in reader:
-            all_epg_count += 1
-            data = EPGDatasetSubsetInternal.model_validate(obj)
-            if meets_condition(data) is False:
-                print(f'Skipping (condition not met): {data.id}')
-                continue
-            if start_date is not None and datetime.fromisoformat(data.start_time) < start_date:
-                print(f'Skipping (before start date): {data.id}')
-                continue
-            if end_date is not None and datetime.fromisoformat(data.start_time) > end_date:
-                print(f'Skipping (after end date): {data.id}')
+    candidate_count = 0  # 重複を除いた抽出候補の番組の件数
+    unique_keys: set[int] = set()
+
+    # チャンネル種別ごとのサブセットの件数
+    target_sizes = {
+        CHANNEL_CLASS_TERRESTRIAL: int(subset_size * TERRESTRIAL_PERCENTAGE),
+        CHANNEL_CLASS_FREE_BS: int(subset_size * FREE_BS_PERCENTAGE),
+        CHANNEL_CLASS_PAID_BS_CS: int(subset_size * PAID_BS_CS_PERCENTAGE),
+    }
+
+    # 重み付きサンプリングに使う乱数生成器
+    rng = np.random.default_rng()
+
+    # Efraimidis-Spirakis 法 (A-Res) で、読み込みと並行して重み付き非復元抽出を行う
+    ## 各要素に key = log(u) / weight (u は (0, 1] の一様乱数) を割り当て、key が大きい順に target_size 件を選ぶ
+    ## 重みに比例した確率で 1 件ずつ選んでは取り除く処理を繰り返すのと同じ分布になるが、全体を 1 回走査するだけで済む
+    ## チャンネル種別ごとに、これまでに読み込んだ抽出候補のうち key が大きい上位 target_size 件の key・バイトオフセット・重みだけを保持する
+    reservoir_keys = {channel_class: np.zeros(0, dtype=np.float64) for channel_class in target_sizes}
+    reservoir_offsets = {channel_class: np.zeros(0, dtype=np.int64) for channel_class in target_sizes}
+    reservoir_weights = {channel_class: np.zeros(0, dtype=np.float64) for channel_class in target_sizes}
+
+    def UpdateReservoirs(offsets: npt.NDArray[np.int64], channel_class: npt.NDArray[np.int8], weights: npt.NDArray[np.float64]) -> None:
+        for target_channel_class, target_size in target_sizes.items():
+            if target_size <= 0:
                 continue
-            # 一意キーを作成
-            unique_key = (data.title, data.description)
-            if unique_key in unique_keys:
-                print(f'Skipping (duplicate): {data.id}')
+            # 重みが 0 以下の要素は選択されないように除外する
+            target = (channel_class == target_channel_class) & (weights > 0)
+            target_count = int(np.count_nonzero(target))
+            if target_count == 0:
                 continue
-            unique_keys.add(unique_key)
-            print(f'Processing: {data.id}')
-            data.weight = get_weight(data)
-            all_epg_data.append(data)
-            if is_terrestrial(data.network_id):
-                terrestrial_data.append(data)
-            elif is_free_bs(data.network_id, data.service_id):
-                free_bs_data.append(data)
-            elif is_paid_bs_cs(data.network_id, data.service_id):
-                paid_bs_cs_data.append(data)
+            # 前回までの上位 target_size 件と今回の抽出候補を合わせ、その中から改めて上位 target_size 件を選ぶ
+            target_weights = weights[target]
+            candidate_keys = np.concatenate([reservoir_keys[target_channel_class], np.log(1.0 - rng.random(target_count)) / target_weights])
+            candidate_offsets = np.concatenate([reservoir_offsets[target_channel_class], offsets[target]])
+            candidate_weights = np.concatenate([reservoir_weights[target_channel_class], target_weights])
+            # 選択可能な要素数が target_size に満たない場合は、選択可能な要素をすべて残す
+            if len(candidate_keys) > target_size:
+                top_indices = np.argpartition(candidate_keys, -target_size)[-target_size:]
+                candidate_keys = candidate_keys[top_indices]
+                candidate_offsets = candidate_offsets[top_indices]
+                candidate_weights = candidate_weights[top_indices]
+            reservoir_keys[target_channel_class] = candidate_keys
+            reservoir_offsets[target_channel_class] = candidate_offsets
+            reservoir_weights[target_channel_class] = candidate_weights
+
+    def ValidateInParallel(executor: ProcessPoolExecutor) -> Iterator[ValidatedChunk]:
+        # JSONL データセットを約 VALIDATION_CHUNK_BYTES ずつのバイト範囲に区切ってワーカープロセスに検証させ、読み込み順に結果を返す
+        ## 各バイト範囲の終端は、区切り位置を含む行の末尾まで進めて行の区切りに揃える
+        ## 一度にすべての範囲を投入すると処理結果がメモリに溜まってしまうため、処理待ちのチャンク数に上限を設ける
+        pending: deque[Future[ValidatedChunk]] = deque()
+        dataset_size = dataset_path.stat().st_size
+        with open(dataset_path, mode='rb') as file:
+            offset = 0
+            while offset < dataset_size:
+                file.seek(offset + VALIDATION_CHUNK_BYTES)
+                file.readline()
+                end_offset = min(file.tell(), dataset_size)
+                pending.append(executor.submit(validate_range, dataset_path, offset, end_offset, start_date, end_date))
+                offset = end_offset
+                if len(pending) >= num_workers * 2:
+                    yield pending.popleft().result()
+        while len(pending) > 0:
+            yield pending.popleft().result()
+
+    skipped_counts = {'condition': 0, 'start_date': 0, 'end_date': 0, 'duplicate': 0}
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for chunk in ValidateInParallel(executor):
+            all_epg_count += chunk.epg_count
+            for reason, count in chunk.skipped_counts.items():
+                skipped_counts[reason] += count
+            # 重複している番組を除いた抽出候補だけを残す
+            ## 同じチャンク内での重複は先に np.unique() でまとめて取り除き、セットの参照はチャンク内で最初に出現した番組だけに絞る
+            _, first_indices = np.unique(chunk.unique_keys, return_index=True)
+            skipped_counts['duplicate'] += len(chunk.unique_keys) - len(first_indices)
+            is_unique = np.zeros(len(chunk.unique_keys), dtype=np.bool_)
+            for index, unique_key in zip(first_indices.tolist(), chunk.unique_keys[first_indices].tolist()):
+                if unique_key in unique_keys:
+                    skipped_counts['duplicate'] += 1
+                    continue
+                unique_keys.add(unique_key)
+                is_unique[index] = True
+            UpdateReservoirs(chunk.offsets[is_unique], chunk.channel_class[is_unique], chunk.weights[is_unique])
+            candidate_count += int(np.count_nonzero(is_unique))
+            # 一定件数ごとに進捗を表示
+            if all_epg_count // PROGRESS_INTERVAL != (all_epg_count - chunk.epg_count) // PROGRESS_INTERVAL:
+                print(f'Processing: {all_epg_count} 件 (うち抽出対象: {candidate_count} 件)')
 
     print('-' * 80)
     print(f'データセットに含まれる番組数: {all_epg_count}')
+    print(f'除外した番組数 (条件を満たさない): {skipped_counts["condition"]}')
+    print(f'除外した番組数 (開始日時より前): {skipped_counts["start_date"]}')
+    print(f'除外した番組数 (終了日時より後): {skipped_counts["end_date"]}')
+    print(f'除外した番組数 (重複): {skipped_counts["duplicate"]}')
     print(f'重複を除いた番組数: {len(unique_keys)}')
 
-    def sample_data(data_list: list[EPGDatasetSubsetInternal], target_size: int) -> list[EPGDatasetSubsetInternal]:
-        sampled_data = []
-        selected_indices = set()
-        data_list_length = len(data_list)
-        for _ in range(target_size):
-            if len(selected_indices) >= data_list_length:  # すべての要素が選択された場合、ループを抜ける
-                break
-            # 選択されていない要素の重みの合計を計算
-            available_weights = [data.weight if index not in selected_indices else 0 for index, data in enumerate(data_list)]
-            total_weight = sum(available_weights)
-            if total_weight == 0:  # すべての要素の重みが0になった場合、ループを抜ける
-                break
-            # 重みに基づいて要素をランダムに選択
-            chosen_index = random.choices(range(data_list_length), weights=available_weights, k=1)[0]
-            selected_indices.add(chosen_index)
-            sampled_data.append(data_list[chosen_index])
-        return sampled_data
-
-    subset_size_terrestrial = int(subset_size * TERRESTRIAL_PERCENTAGE)
-    subset_size_free_bs = int(subset_size * FREE_BS_PERCENTAGE)
-    subset_size_paid_bs_cs = int(subset_size * PAID_BS_CS_PERCENTAGE)
-
+    # サンプリングで選ばれた番組だけを JSONL データセットから読み直してバリデーションする
+    ## なるべくファイルの先頭から順に読めるよう、バイトオフセット順に読み込む
+    ## 飛び飛びの位置を読むことになるため、大きな読み込みバッファは持たせない
+    chosen_offsets = np.concatenate([reservoir_offsets[channel_class] for channel_class in target_sizes])
+    chosen_channel_class = np.concatenate([np.full(len(reservoir_offsets[channel_class]), channel_class, dtype=np.int8) for channel_class in target_sizes])
+    chosen_weights = np.concatenate([reservoir_weights[channel_class] for channel_class in target_sizes])
     subsets: list[EPGDatasetSubsetInternal] = []
-    subsets += sample_data(terrestrial_data, subset_size_terrestrial)
-    subsets += sample_data(free_bs_data, subset_size_free_bs)
-    subsets += sample_data(paid_bs_cs_data, subset_size_paid_bs_cs)
+    with open(dataset_path, mode='rb') as file:
+        for index in np.argsort(chosen_offsets).tolist():
+            file.seek(int(chosen_offsets[index]))
+            data = EPGDatasetSubsetInternal.model_validate_json(strip_raw_field(file.readline()))
+            data.channel_class = int(chosen_channel_class[index])
+            data.weight = float(chosen_weights[index])
+            subsets.append(data)
 
     # ID でソート
     subsets.sort(key=lambda x: x.id)
 
     # 万が一 ID が重複している場合は警告を出して当該番組を除外
-    unique_ids = set()
+    ## イテレーション中のリストから list.remove() すると O(N^2) になる上に直後の要素を読み飛ばしてしまうため、
+    ## 重複していない番組だけを新しいリストに詰め直す
+    unique_ids: set[str] = set()
+    unique_subsets: list[EPGDatasetSubsetInternal] = []
     for subset in subsets:
         if subset.id in unique_ids:
             print(f'Warning: ID が重複しています: {subset.id}')
-            subsets.remove(subset)
+            continue
         unique_ids.add(subset.id)
+        unique_subsets.append(subset)
+    subsets = unique_subsets
 
     # 最終的なサブセットデータセットの割合を月ごと、チャンネル種別ごと、ジャンルごとに確認
-    channel_counts = defaultdict(int)
-    year_counts = defaultdict(int)
-    month_counts = defaultdict(int)
-    major_genre_counts = defaultdict(int)
-    middle_genre_counts = defaultdict(int)
-    for data in subsets:
-        if is_terrestrial(data.network_id):
-            channel_counts['terrestrial'] += 1
-        elif is_free_bs(data.network_id, data.service_id):
-            channel_counts['free_bs'] += 1
-        elif is_paid_bs_cs(data.network_id, data.service_id):
-            channel_counts['paid_bs_cs'] += 1
-        year_counts[datetime.fromisoformat(data.start_time).year] += 1
-        month_counts[datetime.fromisoformat(data.start_time).strftime('%Y-%m')] += 1
-        major_genre_counts[data.major_genre_id] += 1
-        middle_genre_counts[(data.major_genre_id, data.middle_genre_id)] += 1
+    ## 集計は NumPy の配列に対してまとめて行い、1 件ごとに dict を更新する Python のループを回さないようにする
+    subsets_length = len(subsets)
+    channel_class = np.fromiter((data.channel_class for data in subsets), dtype=np.int8, count=subsets_length)
+    major_genre_id = np.fromiter((data.major_genre_id for data in subsets), dtype=np.int32, count=subsets_length)
+    middle_genre_id = np.fromiter((data.middle_genre_id for data in subsets), dtype=np.int32, count=subsets_length)
+    start_year, start_month, _ = parse_start_times([data.start_time for data in subsets])
+    channel_counts = {
+        'terrestrial': int(np.count_nonzero(channel_class == CHANNEL_CLASS_TERRESTRIAL)),
+        'free_bs': int(np.count_nonzero(channel_class == CHANNEL_CLASS_FREE_BS)),
+        'paid_bs_cs': int(np.count_nonzero(channel_class == CHANNEL_CLASS_PAID_BS_CS)),
+    }
+    year_counts = dict(zip(*(array.tolist() for array in np.unique(start_year, return_counts=True))))
+    month_counts = {
+        f'{year_month // 100:04d}-{year_month % 100:02d}': count
+        for year_month, count in zip(*(array.tolist() for array in np.unique(start_year * 100 + start_month, return_counts=True)))
+    }
+    major_genre_counts = dict(zip(*(array.tolist() for array in np.unique(major_genre_id, return_counts=True))))
+    middle_genre_counts = {
+        (genre >> 4, genre & 0xF): count
+        for genre, count in zip(*(array.tolist() for array in np.unique((major_genre_id << 4) | middle_genre_id, return_counts=True)))
+    }
 
     total_count = len(subsets)
-    print('-' * 80)
-    print(f'サブセットの総件数: {total_count}')
+
+    # サブセットの集計結果を表示
+    ## 数百行になることもあるため、1 行ずつ print() せずにまとめてから一度に標準出力へ書き込む
+    summary_lines: list[str] = []
+    summary_lines.append('-' * 80)
+    summary_lines.append(f'サブセットの総件数: {total_count}')
 
     # チャンネル種別ごとの割合を表示
-    print('-' * 80)
-    print(f'地上波: {channel_counts["terrestrial"]: >4} 件 ({channel_counts["terrestrial"] / total_count * 100:.2f}%)')
-    print(f'BS (無料放送): {channel_counts["free_bs"]: >4} 件 ({channel_counts["free_bs"] / total_count * 100:.2f}%)')
-    print(f'BS (有料放送) & CS: {channel_counts["paid_bs_cs"]: >4} 件 ({channel_counts["paid_bs_cs"] / total_count * 100:.2f}%)')
+    summary_lines.append('-' * 80)
+    summary_lines.append(f'地上波: {channel_counts["terrestrial"]: >4} 件 ({channel_counts["terrestrial"] / total_count * 100:.2f}%)')
+    summary_lines.append(f'BS (無料放送): {channel_counts["free_bs"]: >4} 件 ({channel_counts["free_bs"] / total_count * 100:.2f}%)')
+    summary_lines.append(f'BS (有料放送) & CS: {channel_counts["paid_bs_cs"]: >4} 件 ({channel_counts["paid_bs_cs"] / total_count * 100:.2f}%)')
 
     # 年ごとの割合を表示
-    print('-' * 80)
-    print('年ごとの割合:')
+    summary_lines.append('-' * 80)
+    summary_lines.append('年ごとの割合:')
     for year, count in sorted(year_counts.items()):
-        print(f'  {year}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
+        summary_lines.append(f'  {year}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
 
     # 月ごとの割合を表示
-    print('-' * 80)
-    print('月ごとの割合:')
+    summary_lines.append('-' * 80)
+    summary_lines.append('月ごとの割合:')
     for month, count in sorted(month_counts.items()):
-        print(f'  {month}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
+        summary_lines.append(f'  {month}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
 
-    print('-' * 80)
-    print('大分類ジャンルごとの割合:')
+    summary_lines.append('-' * 80)
+    summary_lines.append('大分類ジャンルごとの割合:')
     for major_genre, count in sorted(major_genre_counts.items()):
-        print(f'  {ariblib.constants.CONTENT_TYPE[major_genre][0]}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
+        summary_lines.append(f'  {MAJOR_GENRE_NAMES[major_genre]}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
 
-    print('-' * 80)
-    print('中分類ジャンルごとの割合:')
+    summary_lines.append('-' * 80)
+    summary_lines.append('中分類ジャンルごとの割合:')
     for genre, count in sorted(middle_genre_counts.items()):
-        print(f'  {ariblib.constants.CONTENT_TYPE[genre[0]][0]} - {ariblib.constants.CONTENT_TYPE[genre[0]][1][genre[1]]}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
+        summary_lines.append(f'  {MIDDLE_GENRE_NAMES[genre]}: {count: >4} 件 ({count / total_count * 100:.2f}%)')
+    print('\n'.join(summary_lines))
 
     print('-' * 80)
     print(f'{subset_path} に書き込んでいます...')
-    with jsonlines.open(subset_path, 'w') as writer:
+    with open(subset_path, mode='wb', buffering=JSONL_BUFFER_SIZE) as file:
         for subset in subsets:
-            writer.write(subset.model_dump(mode='json', exclude={'weight'}))  # weight は出力しない
+            file.write(subset.model_dump_json(exclude={'weight', 'channel_class'}).encode('utf-8'))  # weight と channel_class は出力しない
+            file.write(b'\n')
 
     elapsed_time = time.time() - start_time
     print(f'処理時間: {elapsed_time:.2f} 秒')
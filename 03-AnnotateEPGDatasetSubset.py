@@ -1,12 +1,13 @@
 #!/usr/bin/env python
 
 import gradio
-import jsonlines
+import orjson
+import os
 import typer
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any
 
-from utils.constants import EPGDatasetSubset
+from utils.constants import EPGDatasetSubset, JSONL_BUFFER_SIZE
 
 
 app = typer.Typer()
@@ -35,16 +36,57 @@ def main(
 
     typer.echo('=' * 80)
     print('ロード中...')
-    subsets: list[EPGDatasetSubset] = []
-    with jsonlines.open(subset_path, 'r') as reader:
-        for obj in reader:
-            subsets.append(EPGDatasetSubset.model_validate(obj))
+    # サブセットはロード時に一度だけバリデーションし、以降は JSON にそのまま書き出せる dict として保持する
+    ## 確定ボタンを押すたびや書き込み時にモデルとの変換を行わず、変更されたキーだけを書き換える
+    ## サブセットはせいぜい数千〜数万件なので、1 行ずつ読み込まずにファイル全体を一度に読み込んでから行に分割する
+    subsets: list[dict[str, Any]] = []
+    for line in subset_path.read_bytes().splitlines():
+        if line.strip() == b'':
+            continue
+        subsets.append(EPGDatasetSubset.model_validate_json(line).model_dump(mode='json'))
     print(f'ロード完了: {len(subsets)} 件')
+
+    # 前回終了時にサブセットへ反映されなかったアノテーションのログがあれば、サブセットに再適用する
+    ## 確定ボタンを押すたびにサブセット全体を書き直すと件数に比例して遅くなるため、
+    ## アノテーション結果はいったん追記専用のログに 1 行ずつ書き込み、終了時にまとめてサブセットに反映する
+    annotation_log_path = subset_path.with_suffix('.ann.jsonl')
+    if annotation_log_path.exists():
+        replayed_count = 0
+        with open(annotation_log_path, mode='rb', buffering=JSONL_BUFFER_SIZE) as file:
+            for line in file:
+                if line.strip() == b'':
+                    continue
+                annotation = orjson.loads(line)
+                index = annotation['index']
+                if index >= len(subsets) or subsets[index]['id'] != annotation['id']:
+                    print(f'Warning: サブセットに存在しないアノテーションをスキップしました: {annotation["id"]}')
+                    continue
+                subsets[index]['title_without_symbols'] = annotation['title_without_symbols']
+                subsets[index]['description_without_symbols'] = annotation['description_without_symbols']
+                subsets[index]['series_title'] = annotation['series_title']
+                subsets[index]['episode_number'] = annotation['episode_number']
+                subsets[index]['subtitle'] = annotation['subtitle']
+                replayed_count += 1
+        print(f'未反映のアノテーションを再適用しました: {replayed_count} 件')
     typer.echo('=' * 80)
 
+    def SaveSubsets() -> None:
+        """ アノテーション結果をサブセットに書き込み、反映済みのログを削除する """
+
+        # 書き込み途中で中断されてもサブセットが壊れないよう、一時ファイルにまとめて書き込んでから置き換える
+        temp_path = subset_path.with_name(subset_path.name + '.tmp')
+        with open(temp_path, mode='wb', buffering=JSONL_BUFFER_SIZE) as file:
+            for subset in subsets:
+                file.write(orjson.dumps(subset, option=orjson.OPT_APPEND_NEWLINE))
+        os.replace(temp_path, subset_path)
+        annotation_log_path.unlink(missing_ok=True)
+
     # 現在処理中の EPG データサブセットのインデックス
     current_index = start_index
 
+    # アノテーションのログは追記モードで開き、確定ボタンが押されるたびに 1 行ずつ書き込む
+    annotation_log_file = open(annotation_log_path, mode='ab')
+
     def OnClick(
         id: str,
         title_without_symbols: str,
@@ -67,29 +109,38 @@ def main(
         elif current_index < len(subsets):
 
             # サブセットのアノテーションを更新
-            subsets[current_index].title_without_symbols = title_without_symbols.strip()
-            subsets[current_index].description_without_symbols = description_without_symbols.strip()
-            subsets[current_index].series_title = series_title.strip()
-            subsets[current_index].episode_number = episode_number.strip()
-            if subsets[current_index].episode_number == '':
-                subsets[current_index].episode_number = None
-            subsets[current_index].subtitle = subtitle.strip()
-            if subsets[current_index].subtitle == '':
-                subsets[current_index].subtitle = None
-
-            print(f'番組タイトル: {subsets[current_index].title_without_symbols}')
-            print(f'番組概要: {subsets[current_index].description_without_symbols}')
+            subsets[current_index]['title_without_symbols'] = title_without_symbols.strip()
+            subsets[current_index]['description_without_symbols'] = description_without_symbols.strip()
+            subsets[current_index]['series_title'] = series_title.strip()
+            subsets[current_index]['episode_number'] = episode_number.strip()
+            if subsets[current_index]['episode_number'] == '':
+                subsets[current_index]['episode_number'] = None
+            subsets[current_index]['subtitle'] = subtitle.strip()
+            if subsets[current_index]['subtitle'] == '':
+                subsets[current_index]['subtitle'] = None
+
+            print(f'番組タイトル: {subsets[current_index]["title_without_symbols"]}')
+            print(f'番組概要: {subsets[current_index]["description_without_symbols"]}')
             typer.echo('-' * 80)
-            print(f'シリーズタイトル: {subsets[current_index].series_title}')
-            print(f'話数: {subsets[current_index].episode_number} / サブタイトル: {subsets[current_index].subtitle}')
+            print(f'シリーズタイトル: {subsets[current_index]["series_title"]}')
+            print(f'話数: {subsets[current_index]["episode_number"]} / サブタイトル: {subsets[current_index]["subtitle"]}')
             typer.echo('-' * 80)
             print(f'残りデータ数: {len(subsets) - current_index - 1}')
             typer.echo('=' * 80)
 
-            # ファイルに保存
-            with jsonlines.open(subset_path, 'w', flush=True) as writer:
-                for subset in subsets:
-                        writer.write(subset.model_dump(mode='json'))
+            # アノテーションのログに追記
+            ## サブセット本体には終了時にまとめて反映する
+            ## プロセスが強制終了されてもアノテーション結果が失われないよう、1 行書き込むごとにフラッシュする
+            annotation_log_file.write(orjson.dumps({
+                'index': current_index,
+                'id': subsets[current_index]['id'],
+                'title_without_symbols': subsets[current_index]['title_without_symbols'],
+                'description_without_symbols': subsets[current_index]['description_without_symbols'],
+                'series_title': subsets[current_index]['series_title'],
+                'episode_number': subsets[current_index]['episode_number'],
+                'subtitle': subsets[current_index]['subtitle'],
+            }, option=orjson.OPT_APPEND_NEWLINE))
+            annotation_log_file.flush()
 
             # 次の処理対象のファイルのインデックスに進める
             current_index += 1
@@ -110,12 +161,12 @@ def main(
 
         # UI を更新
         return (
-            gradio.Textbox(value=subsets[current_index].id, label='ID (読み取り専用)', interactive=False),
-            gradio.Textbox(value=subsets[current_index].title_without_symbols, label='番組タイトル (明確に番組枠名や記号の除去に失敗している場合のみ編集可)', interactive=True),
-            gradio.Textbox(value=subsets[current_index].description_without_symbols, label='番組概要 (明確に番組枠名や記号の除去に失敗している場合のみ編集可)', interactive=True),
-            gradio.Textbox(value=subsets[current_index].title_without_symbols, label='シリーズタイトル', interactive=True),
-            gradio.Textbox(value=subsets[current_index].title_without_symbols, label='話数 (該当情報がない場合は空欄)', interactive=True),
-            gradio.Textbox(value=subsets[current_index].title_without_symbols, label='サブタイトル (該当情報がない場合は空欄)', interactive=True),
+            gradio.Textbox(value=subsets[current_index]['id'], label='ID (読み取り専用)', interactive=False),
+            gradio.Textbox(value=subsets[current_index]['title_without_symbols'], label='番組タイトル (明確に番組枠名や記号の除去に失敗している場合のみ編集可)', interactive=True),
+            gradio.Textbox(value=subsets[current_index]['description_without_symbols'], label='番組概要 (明確に番組枠名や記号の除去に失敗している場合のみ編集可)', interactive=True),
+            gradio.Textbox(value=subsets[current_index]['title_without_symbols'], label='シリーズタイトル', interactive=True),
+            gradio.Textbox(value=subsets[current_index]['title_without_symbols'], label='話数 (該当情報がない場合は空欄)', interactive=True),
+            gradio.Textbox(value=subsets[current_index]['title_without_symbols'], label='サブタイトル (該当情報がない場合は空欄)', interactive=True),
         )
 
     # Gradio UI の定義と起動
@@ -154,7 +205,13 @@ def main(
                 )
 
         # 0.0.0.0:7860 で Gradio UI を起動
-        gui.launch(server_name='0.0.0.0', server_port=7860)
+        ## Ctrl+C などで Gradio UI が終了したら、ログに溜まったアノテーションをサブセットに反映する
+        try:
+            gui.launch(server_name='0.0.0.0', server_port=7860)
+        finally:
+            annotation_log_file.close()
+            print('アノテーション結果をサブセットに書き込んでいます...')
+            SaveSubsets()
 
 
 if __name__ == '__main__':
@@ -5,6 +5,11 @@ from pydantic import BaseModel
 from utils.edcb import EventInfo
 
 
+# JSONL ファイルの読み書きに使うバッファのサイズ (1MB)
+## 1 行ごとに小さな read/write システムコールが発生しないよう、既定値 (8KB) よりも大きめに確保する
+JSONL_BUFFER_SIZE = 1024 * 1024
+
+
 class EPGDataset(BaseModel):
     id: str
     network_id: int
@@ -19,6 +24,8 @@ class EPGDataset(BaseModel):
     description_without_symbols: str
     major_genre_id: int
     middle_genre_id: int
+    # EDCB から取得した元の番組情報
+    ## 01-GenerateEPGDataset.py ではメモリ使用量を抑えるためモデルには保持せず、JSONL への書き込み時に直接付加する
     raw: EventInfo
 
 
@@ -43,3 +50,4 @@ class EPGDatasetSubset(BaseModel):
 
 class EPGDatasetSubsetInternal(EPGDatasetSubset):
     weight: float = 1.0  # 内部でのみ使用
+    channel_class: int = -1  # 内部でのみ使用 (02-GenerateEPGDatasetSubset.py の CHANNEL_CLASS_* のいずれか)